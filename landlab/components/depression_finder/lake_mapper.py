@@ -406,10 +406,10 @@ class DepressionFinderAndRouter(Component):
         # These two lines assign the False flag to any node that is higher
         # than its partner on the other end of its link
         self._is_pit[
-            h_orth[np.where(self._elev[h_orth] > self._elev[t_orth])[0]]
+            h_orth[np.flatnonzero(self._elev[h_orth] > self._elev[t_orth])]
         ] = False
         self._is_pit[
-            t_orth[np.where(self._elev[t_orth] > self._elev[h_orth])[0]]
+            t_orth[np.flatnonzero(self._elev[t_orth] > self._elev[h_orth])]
         ] = False
 
         # If we have a raster grid, handle the diagonal active links too
@@ -436,7 +436,7 @@ class DepressionFinderAndRouter(Component):
 
         # Record the number of pits and the IDs of pit nodes.
         self._number_of_pits = np.count_nonzero(self._is_pit)
-        self._pit_node_ids = as_id_array(np.where(self._is_pit)[0])
+        self._pit_node_ids = as_id_array(np.flatnonzero(self._is_pit))
 
     def _links_and_nbrs_at_node(self, the_node):
         """Compile and return arrays with IDs of neighbor links and nodes.
@@ -890,7 +890,7 @@ class DepressionFinderAndRouter(Component):
         if isinstance(self._user_supplied_pits, str):
             try:
                 pits = self._grid.at_node[self._user_supplied_pits]
-                supplied_pits = np.where(pits)[0]
+                supplied_pits = np.flatnonzero(pits)
                 self._pit_node_ids = as_id_array(
                     np.setdiff1d(supplied_pits, self._grid.boundary_nodes)
                 )
@@ -903,7 +903,7 @@ class DepressionFinderAndRouter(Component):
             self._find_pits()
         else:  # hopefully an array or other sensible iterable
             if len(self._user_supplied_pits) == self._grid.number_of_nodes:
-                supplied_pits = np.where(self._user_supplied_pits)[0]
+                supplied_pits = np.flatnonzero(self._user_supplied_pits)
             else:  # it's an array of node ids
                 supplied_pits = self._user_supplied_pits
             # remove any boundary nodes from the supplied pit list
@@ -953,7 +953,7 @@ class DepressionFinderAndRouter(Component):
         # ur_nbrs = nbrs[unresolved]
         # ur_links = self._grid.links_at_node[unresolved]
         # return (ur_nbrs, ur_links)
-        return nbrs[np.where(receivers[nbrs] == -1)[0]]
+        return nbrs[np.flatnonzero(receivers[nbrs] == -1)]
 
     def _find_unresolved_neighbors_new(self, nbrs, nbr_links, receivers):
         """Make and return list of neighbors of node with unresolved flow dir.
@@ -980,7 +980,7 @@ class DepressionFinderAndRouter(Component):
         >>> df._find_unresolved_neighbors_new(nbrs, nbr_links, rcvr)
         (array([29, 13]), array([136, 121]))
         """
-        unresolved = np.where(receivers[nbrs] == -1)[0]
+        unresolved = np.flatnonzero(receivers[nbrs] == -1)
         ur_nbrs = nbrs[unresolved]
         ur_links = nbr_links[unresolved]
         return (ur_nbrs, ur_links)
@@ -1106,13 +1106,13 @@ class DepressionFinderAndRouter(Component):
         for outlet_node, lake_code in zip(self.lake_outlets, self.lake_codes):
 
             # Get the nodes in the lake
-            nodes_in_lake = np.where(self._lake_map == lake_code)[0]
+            nodes_in_lake = np.flatnonzero(self._lake_map == lake_code)
             if len(nodes_in_lake) > 0:
 
                 # find the correct outlet for the lake, if necessary
                 if self._lake_map[self._receivers[outlet_node]] == lake_code:
                     nbrs = self._grid.active_adjacent_nodes_at_node[outlet_node]
-                    not_lake = nbrs[np.where(self._lake_map[nbrs] != lake_code)[0]]
+                    not_lake = nbrs[np.flatnonzero(self._lake_map[nbrs] != lake_code)]
                     min_index = np.argmin(self._elev[not_lake])
                     new_receiver = not_lake[min_index]
 
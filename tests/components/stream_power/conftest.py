@@ -0,0 +1,13 @@
+import pytest
+
+from landlab import RasterModelGrid
+from landlab.components import FlowAccumulator
+
+
+@pytest.fixture
+def grid_5x5():
+    """Create a small, flat grid with the fields the eroders need."""
+    mg = RasterModelGrid((5, 5))
+    mg.add_zeros("topographic__elevation", at="node")
+    FlowAccumulator(mg, flow_director="D8")
+    return mg
@@ -7,7 +7,8 @@ a few more times, to ensure repeatability.
 import os
 
 import numpy as np
-from numpy.testing import assert_array_almost_equal
+import pytest
+from numpy.testing import assert_array_almost_equal, assert_array_equal
 
 from landlab import RasterModelGrid
 from landlab.components import FlowAccumulator, SedDepEroder
@@ -25,9 +26,8 @@ def test_sed_dep():
 
     mg = RasterModelGrid((50, 50), xy_spacing=1000.0)
 
-    mg.add_zeros("topographic__elevation", at="node")
     z = np.loadtxt(os.path.join(_THIS_DIR, "seddepinit.txt"))
-    mg["node"]["topographic__elevation"] = z
+    mg.add_field("topographic__elevation", z, at="node")
 
     mg.set_closed_boundaries_at_grid_edges(True, False, True, False)
 
@@ -48,16 +48,15 @@ def test_sed_dep():
         g=9.81,
     )
 
+    core = mg.core_nodes
     for i in range(nt):
-        mg.at_node["topographic__elevation"][mg.core_nodes] += uplift_per_step
+        mg.at_node["topographic__elevation"][core] += uplift_per_step
         mg = fr.run_one_step()
         mg, _ = sde.run_one_step(dt)
 
     z_tg = np.loadtxt(os.path.join(_THIS_DIR, "seddepz_tg.txt"))
 
-    assert_array_almost_equal(
-        mg.at_node["topographic__elevation"][mg.core_nodes], z_tg[mg.core_nodes]
-    )
+    assert_array_almost_equal(mg.at_node["topographic__elevation"][core], z_tg[core])
 
 
 def test_sed_dep_new():
@@ -68,8 +67,10 @@ def test_sed_dep_new():
     of the next 1000 y of erosion.
     """
     mg = RasterModelGrid((25, 50), xy_spacing=200.0)
-    for edge in (mg.nodes_at_left_edge, mg.nodes_at_top_edge, mg.nodes_at_right_edge):
-        mg.status_at_node[edge] = mg.BC_NODE_IS_CLOSED
+    closed_edges = np.concatenate(
+        (mg.nodes_at_left_edge, mg.nodes_at_top_edge, mg.nodes_at_right_edge)
+    )
+    mg.status_at_node[closed_edges] = mg.BC_NODE_IS_CLOSED
 
     z = mg.add_zeros("topographic__elevation", at="node")
 
@@ -82,16 +83,89 @@ def test_sed_dep_new():
         K_t=1.0e-4,
     )
 
-    initconds = os.path.join(os.path.dirname(__file__), "perturbedcondst300.txt")
-    finalconds = os.path.join(os.path.dirname(__file__), "tenmorestepsfrom300.txt")
+    initconds = os.path.join(_THIS_DIR, "perturbedcondst300.txt")
+    finalconds = os.path.join(_THIS_DIR, "tenmorestepsfrom300.txt")
     z[:] = np.loadtxt(initconds)
 
     dt = 100.0
     up = 0.05
 
+    core = mg.core_nodes
     for i in range(10):
         fr.run_one_step()
         sde.run_one_step(dt)
-        z[mg.core_nodes] += 20.0 * up
+        z[core] += 20.0 * up
 
     assert_array_almost_equal(z, np.loadtxt(finalconds))
+
+
+def test_flux_fn_genhump(grid_5x5):
+    sde = SedDepEroder(grid_5x5, sed_dependency_type="generalized_humped")
+
+    xs = np.linspace(0.0, 1.0, 1001)
+    sff = sde.get_sed_flux_function(xs)
+
+    assert sff.shape == xs.shape
+    assert xs[sff.argmax()] == pytest.approx(0.264)
+    assert sff.max() == pytest.approx(1.0, abs=1.0e-4)
+
+
+def test_pseudoimplicit_const_converges(grid_5x5, monkeypatch):
+    sde = SedDepEroder(grid_5x5, sed_dependency_type="None", pseudoimplicit_repeats=50)
+
+    calls = []
+    sed_flux_fn_gen = sde._sed_flux_fn_gen
+
+    def counted_sed_flux_fn_gen(rel_sed_flux):
+        calls.append(sed_flux_fn_gen(rel_sed_flux))
+        return calls[-1]
+
+    monkeypatch.setattr(sde, "_sed_flux_fn_gen", counted_sed_flux_fn_gen)
+
+    # dz, sed flux out, relative sed flux, error in sed flux function
+    values = sde.get_sed_flux_function_pseudoimplicit(1.0, 10.0, 2.0, 0.5)
+    assert_array_almost_equal(values, [0.5, 3.0, 0.3, 0.0])
+
+    # the solver runs per node, so it must stay on scalars, not 0-d arrays
+    assert all(np.isscalar(value) for value in values)
+    assert all(np.isscalar(sed_flux_fn) for sed_flux_fn in calls)
+
+    # two passes to reach the fixed point, then the final evaluation
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "sed_dependency_type,expected",
+    [
+        ("None", [1.0, 1.0, 1.0, 1.0]),
+        ("linear_decline", [1.0, 0.95, 0.5, 0.0]),
+        ("almost_parabolic", [0.1, 0.23, 1.0, 0.0]),
+    ],
+)
+def test_sed_flux_fn_forms(grid_5x5, sed_dependency_type, expected):
+    sde = SedDepEroder(grid_5x5, sed_dependency_type=sed_dependency_type)
+    xs = np.array([0.0, 0.05, 0.5, 1.0])
+    result = sde.get_sed_flux_function(xs)
+
+    # the public method matches the input's shape; the per-node kernels
+    # behind it are free to return scalars
+    assert result.shape == xs.shape
+    assert_array_almost_equal(result, expected)
+
+
+def test_flooded_depths_as_array():
+    z_final = []
+    for flooded_depths in (None, np.zeros(25)):
+        mg = RasterModelGrid((5, 5), xy_spacing=100.0)
+        z = mg.add_field("topographic__elevation", mg.node_x + mg.node_y, at="node")
+        fa = FlowAccumulator(mg, flow_director="D8")
+        sde = SedDepEroder(
+            mg, sed_dependency_type="linear_decline", flooded_depths=flooded_depths
+        )
+        fa.run_one_step()
+        sde.run_one_step(1000.0)
+        z_final.append(z.copy())
+
+    core = mg.core_nodes
+    assert np.all(z_final[0][core] < (mg.node_x + mg.node_y)[core])
+    assert_array_equal(z_final[1], z_final[0])